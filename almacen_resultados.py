@@ -0,0 +1,169 @@
+"""
+Almacén persistente de resultados para el Sistema Experto Difuso
+Guarda en un archivo SQLite local los resultados de inferencia ya calculados
+"""
+
+import hashlib
+import sqlite3
+import threading
+
+# Cantidad máxima de claves por consulta (SQLite limita los parámetros por sentencia)
+TAMANO_LOTE_CONSULTA = 500
+
+
+def clave_entrada(huella, edad, ingresos, conocimiento, tolerancia):
+    """
+    Calcula la clave de un caso a partir de sus entradas y de la huella del modelo.
+
+    Args:
+        huella (str): Huella de las funciones de membresía y reglas del sistema
+        edad (int): Edad del inversor
+        ingresos (int): Ingresos mensuales
+        conocimiento (float): Nivel de conocimiento financiero
+        tolerancia (float): Tolerancia al riesgo
+
+    Returns:
+        str: Hash SHA-256 en hexadecimal que identifica al caso
+    """
+    # Normalizar a float para que 30 y 30.0 produzcan la misma clave
+    texto = "|".join(
+        [huella]
+        + [repr(float(valor)) for valor in (edad, ingresos, conocimiento, tolerancia)]
+    )
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class AlmacenResultados:
+    """
+    Almacén de resultados de inferencia respaldado por un archivo SQLite.
+
+    Cada resultado se indexa por la clave de sus entradas (ver `clave_entrada`),
+    que incluye la huella del modelo que lo produjo. Un cambio en las funciones de
+    membresía o en las reglas produce claves nuevas, de modo que los resultados
+    anteriores nunca se reutilizan para otro modelo; varios modelos pueden
+    compartir el mismo archivo sin invalidarse entre sí.
+
+    Una misma instancia puede usarse desde varios hilos: la conexión se comparte
+    y cada operación se serializa con un bloqueo interno.
+    """
+
+    def __init__(self, ruta="resultados.db"):
+        """
+        Abre (o crea) el archivo SQLite del almacén.
+
+        Args:
+            ruta (str): Ruta del archivo SQLite (":memory:" para un almacén temporal)
+        """
+        self.ruta = ruta
+        # La conexión se protege con self._bloqueo, por lo que puede usarse
+        # desde hilos distintos al que la creó
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._bloqueo = threading.Lock()
+        with self._bloqueo, self.conexion:
+            self.conexion.execute(
+                "CREATE TABLE IF NOT EXISTS resultados ("
+                "clave TEXT PRIMARY KEY, "
+                "huella TEXT NOT NULL, "
+                "valor_perfil REAL, "
+                "potencial REAL, "
+                "riesgo REAL)"
+            )
+            self.conexion.execute(
+                "CREATE INDEX IF NOT EXISTS resultados_huella ON resultados (huella)"
+            )
+
+    @staticmethod
+    def claves(huella, casos):
+        """
+        Calcula las claves de varios casos para un modelo.
+
+        Args:
+            huella (str): Huella del modelo (ver `huella_modelo()`)
+            casos (iterable): Tuplas (edad, ingresos, conocimiento, tolerancia)
+
+        Returns:
+            list: Claves en el mismo orden que los casos
+        """
+        return [clave_entrada(huella, *caso) for caso in casos]
+
+    def buscar_lote(self, claves):
+        """
+        Recupera los resultados almacenados para un conjunto de claves.
+
+        Args:
+            claves (iterable): Claves calculadas con `claves()`
+
+        Returns:
+            dict: Resultados encontrados, indexados por clave (las ausentes se omiten)
+        """
+        claves = list(dict.fromkeys(claves))
+        encontrados = {}
+        with self._bloqueo:
+            for inicio in range(0, len(claves), TAMANO_LOTE_CONSULTA):
+                bloque = claves[inicio : inicio + TAMANO_LOTE_CONSULTA]
+                marcadores = ", ".join("?" * len(bloque))
+                filas = self.conexion.execute(
+                    "SELECT clave, valor_perfil, potencial, riesgo FROM resultados "
+                    f"WHERE clave IN ({marcadores})",
+                    bloque,
+                )
+                for clave, valor_perfil, potencial, riesgo in filas:
+                    encontrados[clave] = {
+                        "valor_perfil": valor_perfil,
+                        "potencial": potencial,
+                        "riesgo": riesgo,
+                    }
+        return encontrados
+
+    def guardar_lote(self, huella, resultados):
+        """
+        Inserta o actualiza varios resultados en una única transacción.
+
+        Args:
+            huella (str): Huella del modelo que produjo los resultados
+            resultados (dict): Resultados de `evaluar()` indexados por clave
+        """
+        filas = [
+            (
+                clave,
+                huella,
+                float(resultado["valor_perfil"]),
+                float(resultado["potencial"]),
+                float(resultado["riesgo"]),
+            )
+            for clave, resultado in resultados.items()
+        ]
+        with self._bloqueo, self.conexion:
+            self.conexion.executemany(
+                "INSERT OR REPLACE INTO resultados "
+                "(clave, huella, valor_perfil, potencial, riesgo) "
+                "VALUES (?, ?, ?, ?, ?)",
+                filas,
+            )
+
+    def descartar_huella(self, huella):
+        """
+        Elimina los resultados producidos por un modelo que ya no se utiliza.
+
+        Args:
+            huella (str): Huella del modelo cuyos resultados se descartan
+
+        Returns:
+            int: Cantidad de resultados eliminados
+        """
+        with self._bloqueo, self.conexion:
+            cursor = self.conexion.execute(
+                "DELETE FROM resultados WHERE huella = ?", (huella,)
+            )
+        return cursor.rowcount
+
+    def cerrar(self):
+        """Cierra la conexión con el archivo SQLite."""
+        with self._bloqueo:
+            self.conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,124 @@
+"""
+Registro de versiones del Sistema Experto Difuso
+Permite cambiar los parámetros del modelo en un proceso en ejecución sin reiniciarlo
+"""
+
+import threading
+
+from sistema_experto import SistemaExpertoDifusoInversorFCL
+
+
+class RegistroModelos:
+    """
+    Registro de versiones de parámetros del sistema experto difuso.
+
+    Cada versión es un modelo independiente que no se modifica una vez publicado.
+    El cambio de versión activa es un simple reemplazo de referencia que no espera
+    a las evaluaciones: las que están en curso terminan con el modelo que
+    obtuvieron y las siguientes usan la nueva versión. Las evaluaciones sobre una
+    misma versión se serializan (su simulación no admite uso concurrente); las de
+    versiones distintas se ejecutan de forma independiente.
+    """
+
+    def __init__(self, modelo=None):
+        """
+        Inicializa el registro con un modelo base como versión activa.
+
+        Args:
+            modelo (SistemaExpertoDifusoInversorFCL, opcional): Modelo inicial
+                (por defecto, uno con los parámetros del archivo FCL)
+        """
+        if modelo is None:
+            modelo = SistemaExpertoDifusoInversorFCL()
+        self._modelos = {modelo.version: modelo}
+        self._activo = modelo
+        # Solo serializa las publicaciones y activaciones, no las evaluaciones
+        self._bloqueo = threading.Lock()
+
+    @property
+    def version_activa(self):
+        """int: Versión del modelo activo."""
+        return self._activo.version
+
+    def versiones(self):
+        """
+        Devuelve las versiones registradas.
+
+        Returns:
+            list: Números de versión en orden ascendente
+        """
+        return sorted(self._modelos)
+
+    def modelo(self, version=None):
+        """
+        Devuelve el modelo de una versión.
+
+        Args:
+            version (int, opcional): Versión buscada (por defecto, la activa)
+
+        Returns:
+            SistemaExpertoDifusoInversorFCL: Modelo de la versión indicada
+
+        Raises:
+            ValueError: Si la versión no está registrada
+        """
+        if version is None:
+            return self._activo
+        try:
+            return self._modelos[version]
+        except KeyError:
+            raise ValueError(f"Versión de modelo no registrada: {version}")
+
+    def publicar(self, cambios, activar=True):
+        """
+        Registra una nueva versión a partir de la activa con los parámetros modificados.
+
+        Args:
+            cambios (dict): Puntos nuevos por variable y término, por ejemplo
+                {"edad": {"joven": [20, 20, 30, 45]}}
+            activar (bool): Si la nueva versión pasa a ser la activa
+
+        Returns:
+            int: Número de la versión publicada
+
+        Raises:
+            ValueError: Si una variable o término no existe, o los puntos no son válidos
+        """
+        with self._bloqueo:
+            version = max(self._modelos) + 1
+            nuevo = self._activo.con_parametros(cambios, version)
+            self._modelos[version] = nuevo
+            if activar:
+                self._activo = nuevo
+        return version
+
+    def activar(self, version):
+        """
+        Cambia la versión activa (por ejemplo, para volver a una versión anterior).
+
+        Args:
+            version (int): Versión registrada a activar
+
+        Raises:
+            ValueError: Si la versión no está registrada
+        """
+        with self._bloqueo:
+            self._activo = self.modelo(version)
+
+    def evaluar(self, edad, ingresos, conocimiento, tolerancia):
+        """
+        Evalúa un caso con el modelo activo.
+
+        Returns:
+            dict: Resultado de `evaluar()`, incluida la versión del modelo utilizada
+        """
+        return self._activo.evaluar(edad, ingresos, conocimiento, tolerancia)
+
+    def evaluar_lote(self, casos, almacen=None):
+        """
+        Evalúa varios casos con el modelo activo.
+
+        Returns:
+            list: Resultados de `evaluar_lote()`, incluida la versión del modelo utilizada
+        """
+        return self._activo.evaluar_lote(casos, almacen)
@@ -3,10 +3,61 @@ Sistema Experto Difuso para determinar el perfil de un inversor
 Implementación en Python del archivo FCL (Fuzzy Control Language)
 """
 
+import copy
+import hashlib
+import numbers
+import threading
+
 import numpy as np
 from skfuzzy import control as ctrl
 import skfuzzy as fuzz
 
+# Puntos de las funciones de membresía de cada término lingüístico:
+# 3 puntos definen una función triangular (trimf) y 4 una trapezoidal (trapmf)
+PARAMETROS_MEMBRESIA = {
+    "edad": {
+        "joven": [20, 20, 30, 40],  # Hasta 40 años
+        "medio": [35, 45, 55],  # Entre 35 y 55
+        "mayor": [50, 60, 100, 100],  # Desde 50
+    },
+    # Ingresos en unidades monetarias
+    "ingresos": {
+        "bajo": [0, 0, 1000, 2000],
+        "medio": [1500, 3000, 4500],
+        "alto": [4000, 5000, 15000, 15000],
+    },
+    # Conocimiento financiero (escala 0-10)
+    "conocimiento": {
+        "bajo": [0, 0, 2, 4],
+        "medio": [3, 5, 7],
+        "alto": [6, 8, 10, 10],
+    },
+    # Tolerancia al riesgo (escala 0-10)
+    "tolerancia": {
+        "bajo": [0, 0, 2, 4],
+        "medio": [3, 5, 7],
+        "alto": [6, 8, 10, 10],
+    },
+    # Potencial de inversión (escala 0-10)
+    "potencial": {
+        "bajo": [0, 0, 2, 4],
+        "medio": [3, 5, 7],
+        "alto": [6, 8, 10, 10],
+    },
+    # Riesgo (escala 0-10)
+    "riesgo": {
+        "bajo": [0, 0, 2, 4],
+        "medio": [3, 5, 7],
+        "alto": [6, 8, 10, 10],
+    },
+    # Perfil inversor (escala 0-10)
+    "perfil_inversor": {
+        "conservador": [0, 0, 2.5, 4.5],
+        "moderado": [3.5, 5, 7.5],
+        "agresivo": [6.5, 8.5, 10, 10],
+    },
+}
+
 
 class SistemaExpertoDifusoInversorFCL:
     """
@@ -19,8 +70,24 @@ class SistemaExpertoDifusoInversorFCL:
     Implementación basada en el archivo FCL 'inv.fcl'
     """
 
-    def __init__(self):
-        """Inicializa el sistema experto difuso con todas las variables y reglas necesarias."""
+    def __init__(self, parametros=None, version=1):
+        """
+        Inicializa el sistema experto difuso con todas las variables y reglas necesarias.
+
+        Args:
+            parametros (dict, opcional): Puntos de las funciones de membresía con la
+                estructura de PARAMETROS_MEMBRESIA (por defecto, los del archivo FCL)
+            version (int): Versión del modelo, incluida en cada resultado
+        """
+        self.parametros = copy.deepcopy(
+            PARAMETROS_MEMBRESIA if parametros is None else parametros
+        )
+        self.version = version
+        self._huella = None
+        # La simulación guarda estado entre input, compute y output,
+        # por lo que las evaluaciones sobre un mismo modelo se serializan
+        self._bloqueo_simulacion = threading.Lock()
+
         # Definir variables de entrada (universos de discurso)
         self.edad = ctrl.Antecedent(np.arange(20, 101, 1), "edad")
         self.ingresos = ctrl.Antecedent(np.arange(0, 15001, 100), "ingresos")
@@ -53,61 +120,70 @@ class SistemaExpertoDifusoInversorFCL:
         Define las funciones de membresía para todas las variables lingüísticas del sistema.
 
         Implementa funciones triangulares (trimf) y trapezoidales (trapmf) para modelar
-        los conjuntos difusos correspondientes a cada término lingüístico.
+        los conjuntos difusos correspondientes a cada término lingüístico, a partir de
+        los puntos definidos en `self.parametros`.
         """
-        # Funciones de membresía para variable EDAD
-        self.edad["joven"] = fuzz.trapmf(
-            self.edad.universe, [20, 20, 30, 40]
-        )  # Hasta 40 años
-        self.edad["medio"] = fuzz.trimf(
-            self.edad.universe, [35, 45, 55]
-        )  # Entre 35 y 55
-        self.edad["mayor"] = fuzz.trapmf(
-            self.edad.universe, [50, 60, 100, 100]
-        )  # Desde 50
-
-        # Funciones de membresía para variable INGRESOS (en unidades monetarias)
-        self.ingresos["bajo"] = fuzz.trapmf(self.ingresos.universe, [0, 0, 1000, 2000])
-        self.ingresos["medio"] = fuzz.trimf(self.ingresos.universe, [1500, 3000, 4500])
-        self.ingresos["alto"] = fuzz.trapmf(
-            self.ingresos.universe, [4000, 5000, 15000, 15000]
-        )
+        for variable in self._variables():
+            for etiqueta, puntos in self.parametros[variable.label].items():
+                variable[etiqueta] = self._funcion_membresia(variable, puntos)
 
-        # Funciones de membresía para variable CONOCIMIENTO (escala 0-10)
-        self.conocimiento["bajo"] = fuzz.trapmf(
-            self.conocimiento.universe, [0, 0, 2, 4]
-        )
-        self.conocimiento["medio"] = fuzz.trimf(self.conocimiento.universe, [3, 5, 7])
-        self.conocimiento["alto"] = fuzz.trapmf(
-            self.conocimiento.universe, [6, 8, 10, 10]
-        )
-
-        # Funciones de membresía para variable TOLERANCIA AL RIESGO (escala 0-10)
-        self.tolerancia["bajo"] = fuzz.trapmf(self.tolerancia.universe, [0, 0, 2, 4])
-        self.tolerancia["medio"] = fuzz.trimf(self.tolerancia.universe, [3, 5, 7])
-        self.tolerancia["alto"] = fuzz.trapmf(self.tolerancia.universe, [6, 8, 10, 10])
+    @staticmethod
+    def _funcion_membresia(variable, puntos):
+        """
+        Calcula el arreglo de pertenencia de un término sobre el universo de la variable.
 
-        # Funciones de membresía para variable POTENCIAL DE INVERSIÓN (escala 0-10)
-        self.potencial["bajo"] = fuzz.trapmf(self.potencial.universe, [0, 0, 2, 4])
-        self.potencial["medio"] = fuzz.trimf(self.potencial.universe, [3, 5, 7])
-        self.potencial["alto"] = fuzz.trapmf(self.potencial.universe, [6, 8, 10, 10])
+        Args:
+            variable: Antecedente o consecuente al que pertenece el término
+            puntos (list): 3 puntos para trimf o 4 puntos para trapmf
 
-        # Funciones de membresía para variable RIESGO (escala 0-10)
-        self.riesgo["bajo"] = fuzz.trapmf(self.riesgo.universe, [0, 0, 2, 4])
-        self.riesgo["medio"] = fuzz.trimf(self.riesgo.universe, [3, 5, 7])
-        self.riesgo["alto"] = fuzz.trapmf(self.riesgo.universe, [6, 8, 10, 10])
+        Returns:
+            numpy.ndarray: Grado de pertenencia para cada valor del universo
 
-        # Funciones de membresía para variable PERFIL INVERSOR (escala 0-10)
-        self.perfil_inversor["conservador"] = fuzz.trapmf(
-            self.perfil_inversor.universe, [0, 0, 2.5, 4.5]
-        )
-        self.perfil_inversor["moderado"] = fuzz.trimf(
-            self.perfil_inversor.universe, [3.5, 5, 7.5]
-        )
+        Raises:
+            ValueError: Si los puntos no son números ordenados dentro del universo
+        """
+        if len(puntos) not in (3, 4):
+            raise ValueError(
+                f"La función de membresía de '{variable.label}' debe tener 3 (trimf) "
+                f"o 4 (trapmf) puntos"
+            )
+        if not all(
+            isinstance(punto, numbers.Real)
+            and not isinstance(punto, bool)
+            and np.isfinite(punto)
+            for punto in puntos
+        ):
+            raise ValueError(
+                f"Los puntos de la función de membresía de '{variable.label}' "
+                f"deben ser numéricos"
+            )
+        if any(anterior > siguiente for anterior, siguiente in zip(puntos, puntos[1:])):
+            raise ValueError(
+                f"Los puntos de la función de membresía de '{variable.label}' "
+                f"deben estar en orden no decreciente"
+            )
+        minimo, maximo = variable.universe.min(), variable.universe.max()
+        if puntos[0] < minimo or puntos[-1] > maximo:
+            raise ValueError(
+                f"Los puntos de la función de membresía de '{variable.label}' "
+                f"deben estar entre {minimo:g} y {maximo:g}"
+            )
 
-        self.perfil_inversor["agresivo"] = fuzz.trapmf(
-            self.perfil_inversor.universe, [6.5, 8.5, 10, 10]
-        )
+        if len(puntos) == 3:
+            return fuzz.trimf(variable.universe, puntos)
+        return fuzz.trapmf(variable.universe, puntos)
+
+    def _variables(self):
+        """Devuelve todas las variables lingüísticas del sistema."""
+        return [
+            self.edad,
+            self.ingresos,
+            self.conocimiento,
+            self.tolerancia,
+            self.potencial,
+            self.riesgo,
+            self.perfil_inversor,
+        ]
 
     def definir_reglas(self):
         """
@@ -314,6 +390,7 @@ class SistemaExpertoDifusoInversorFCL:
                 - valor_perfil (float): Valor numérico del perfil en escala 0-10
                 - potencial (float): Valor numérico del potencial de inversión en escala 0-10
                 - riesgo (float): Valor numérico del nivel de riesgo en escala 0-10
+                - version (int): Versión del modelo que produjo el resultado
 
         Raises:
             ValueError: Si algún parámetro está fuera de los rangos permitidos
@@ -329,28 +406,188 @@ class SistemaExpertoDifusoInversorFCL:
             raise ValueError("La tolerancia al riesgo debe estar entre 1 y 10")
 
         try:
-            # Asignar valores a las variables de entrada
-            self.simulacion.input["edad"] = edad
-            self.simulacion.input["ingresos"] = ingresos
-            self.simulacion.input["conocimiento"] = conocimiento
-            self.simulacion.input["tolerancia"] = tolerancia
+            with self._bloqueo_simulacion:
+                # Asignar valores a las variables de entrada
+                self.simulacion.input["edad"] = edad
+                self.simulacion.input["ingresos"] = ingresos
+                self.simulacion.input["conocimiento"] = conocimiento
+                self.simulacion.input["tolerancia"] = tolerancia
 
-            # Ejecutar el sistema de inferencia difusa
-            self.simulacion.compute()
+                # Ejecutar el sistema de inferencia difusa
+                self.simulacion.compute()
 
-            # Obtener resultados
-            valor_potencial = self.simulacion.output["potencial"]
-            valor_riesgo = self.simulacion.output["riesgo"]
-            valor_perfil = self.simulacion.output["perfil_inversor"]
+                # Obtener resultados
+                valor_potencial = self.simulacion.output["potencial"]
+                valor_riesgo = self.simulacion.output["riesgo"]
+                valor_perfil = self.simulacion.output["perfil_inversor"]
 
             # Preparar diccionario de resultados
             resultados = {
                 "valor_perfil": valor_perfil,
                 "potencial": valor_potencial,
                 "riesgo": valor_riesgo,
+                "version": self.version,
             }
 
             return resultados
 
         except Exception as e:
             raise Exception(f"Error en la evaluación del perfil: {str(e)}")
+
+    def con_parametros(self, cambios, version):
+        """
+        Crea una nueva versión del modelo con algunas funciones de membresía modificadas.
+
+        El modelo actual no se modifica ni se bloquea, por lo que las evaluaciones en
+        curso sobre él no se ven afectadas. La copia conserva las variables, reglas y
+        el sistema de control; solo se recalculan los arreglos de pertenencia de los
+        términos modificados y se crea una simulación nueva.
+
+        Args:
+            cambios (dict): Puntos nuevos por variable y término, por ejemplo
+                {"edad": {"joven": [20, 20, 30, 45]}}
+            version (int): Versión asignada al nuevo modelo
+
+        Returns:
+            SistemaExpertoDifusoInversorFCL: Nuevo modelo con los parámetros aplicados
+
+        Raises:
+            ValueError: Si una variable o término no existe, o los puntos no son válidos
+        """
+        variables = {variable.label: variable for variable in self._variables()}
+        for nombre, terminos in cambios.items():
+            if nombre not in variables:
+                raise ValueError(f"Variable desconocida: '{nombre}'")
+            if not isinstance(terminos, dict):
+                raise ValueError(
+                    f"Los cambios de la variable '{nombre}' deben ser un diccionario "
+                    f"de términos y puntos"
+                )
+            for etiqueta in terminos:
+                if etiqueta not in variables[nombre].terms:
+                    raise ValueError(
+                        f"Término desconocido: '{etiqueta}' en la variable '{nombre}'"
+                    )
+
+        nuevo = copy.deepcopy(self)
+        nuevo.version = version
+        nuevo._huella = None
+
+        variables = {variable.label: variable for variable in nuevo._variables()}
+        for nombre, terminos in cambios.items():
+            for etiqueta, puntos in terminos.items():
+                variable = variables[nombre]
+                # Reemplazar el arreglo del término existente para que las reglas
+                # (que referencian al término) usen la nueva función
+                variable.terms[etiqueta].mf = self._funcion_membresia(variable, puntos)
+                nuevo.parametros[nombre][etiqueta] = list(puntos)
+
+        return nuevo
+
+    def __deepcopy__(self, memo):
+        """
+        Copia el modelo sin su simulación, que otros hilos pueden estar usando.
+
+        El estado de cada simulación de scikit-fuzzy se guarda fuera de las
+        variables, términos y reglas, por lo que estos pueden copiarse aunque
+        haya evaluaciones en curso. La copia recibe una simulación y un bloqueo
+        propios.
+        """
+        nuevo = self.__class__.__new__(self.__class__)
+        memo[id(self)] = nuevo
+        for nombre, valor in self.__dict__.items():
+            if nombre not in ("simulacion", "_bloqueo_simulacion"):
+                setattr(nuevo, nombre, copy.deepcopy(valor, memo))
+        nuevo.simulacion = ctrl.ControlSystemSimulation(nuevo.sistema_ctrl)
+        nuevo._bloqueo_simulacion = threading.Lock()
+        return nuevo
+
+    def huella_modelo(self):
+        """
+        Calcula una huella del modelo a partir de sus funciones de membresía y reglas.
+
+        La huella cambia siempre que cambie el resultado de `definir_funciones_membresia()`
+        o de `definir_reglas()`, por lo que sirve para invalidar resultados almacenados.
+
+        Returns:
+            str: Hash SHA-256 en hexadecimal
+        """
+        if self._huella is not None:
+            return self._huella
+
+        huella = hashlib.sha256()
+        for variable in self._variables():
+            huella.update(variable.label.encode("utf-8"))
+            huella.update(np.asarray(variable.universe, dtype=float).tobytes())
+            huella.update(
+                str(getattr(variable, "defuzzify_method", "")).encode("utf-8")
+            )
+            for etiqueta, termino in variable.terms.items():
+                huella.update(etiqueta.encode("utf-8"))
+                huella.update(np.asarray(termino.mf, dtype=float).tobytes())
+        for regla in self.reglas:
+            huella.update(repr(regla).encode("utf-8"))
+        self._huella = huella.hexdigest()
+        return self._huella
+
+    def evaluar_lote(self, casos, almacen=None):
+        """
+        Evalúa el perfil de inversión de varios casos, reutilizando resultados previos.
+
+        Los casos repetidos dentro del lote se infieren una sola vez. Si se indica un
+        almacén, se consultan primero sus resultados y solo se infieren los faltantes,
+        que luego se guardan en bloque (también los ya inferidos si un caso falla).
+
+        Args:
+            casos (iterable): Tuplas (edad, ingresos, conocimiento, tolerancia)
+            almacen (AlmacenResultados, opcional): Almacén persistente de resultados
+
+        Returns:
+            list: Diccionarios de resultados en el mismo orden que los casos,
+                con el formato devuelto por `evaluar()` y valores de tipo float
+
+        Raises:
+            ValueError: Si algún parámetro está fuera de los rangos permitidos
+        """
+        casos = list(casos)
+        # Normalizar a float para que 30 y 30.0 se consideren el mismo caso
+        entradas = [tuple(float(valor) for valor in caso) for caso in casos]
+
+        huella = None
+        claves = {}
+        encontrados = {}
+        if almacen is not None:
+            huella = self.huella_modelo()
+            claves = dict(zip(entradas, almacen.claves(huella, entradas)))
+            guardados = almacen.buscar_lote(claves.values())
+            encontrados = {
+                entrada: guardados[clave]
+                for entrada, clave in claves.items()
+                if clave in guardados
+            }
+
+        nuevos = {}
+        resultados = []
+        try:
+            for caso, entrada in zip(casos, entradas):
+                resultado = encontrados.get(entrada) or nuevos.get(entrada)
+                if resultado is None:
+                    inferido = self.evaluar(*caso)
+                    resultado = {
+                        "valor_perfil": float(inferido["valor_perfil"]),
+                        "potencial": float(inferido["potencial"]),
+                        "riesgo": float(inferido["riesgo"]),
+                    }
+                    nuevos[entrada] = resultado
+                resultados.append(dict(resultado, version=self.version))
+        finally:
+            if almacen is not None and nuevos:
+                almacen.guardar_lote(
+                    huella,
+                    {
+                        claves[entrada]: resultado
+                        for entrada, resultado in nuevos.items()
+                    },
+                )
+
+        return resultados
@@ -0,0 +1,146 @@
+"""
+Pruebas del almacén de resultados y de la evaluación por lotes
+"""
+
+import threading
+
+import pytest
+
+from almacen_resultados import AlmacenResultados
+from sistema_experto import SistemaExpertoDifusoInversorFCL
+
+CASOS = [(30, 5000, 7, 8), (65, 2000, 3, 2), (45, 3000, 5, 5)]
+
+
+class SistemaContador(SistemaExpertoDifusoInversorFCL):
+    """Sistema que cuenta las inferencias realizadas."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.inferencias = 0
+
+    def evaluar(self, *caso):
+        self.inferencias += 1
+        return super().evaluar(*caso)
+
+
+class SistemaSinUltimaRegla(SistemaContador):
+    """Sistema con una regla menos, y por lo tanto con otra huella."""
+
+    def definir_reglas(self):
+        return super().definir_reglas()[:-1]
+
+
+@pytest.fixture
+def sistema():
+    return SistemaContador()
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    with AlmacenResultados(str(tmp_path / "resultados.db")) as almacen:
+        yield almacen
+
+
+def test_evaluar_lote_coincide_con_evaluar(sistema):
+    resultados = sistema.evaluar_lote(CASOS)
+
+    for caso, resultado in zip(CASOS, resultados):
+        esperado = sistema.evaluar(*caso)
+        assert resultado["valor_perfil"] == pytest.approx(esperado["valor_perfil"])
+        assert resultado["potencial"] == pytest.approx(esperado["potencial"])
+        assert resultado["riesgo"] == pytest.approx(esperado["riesgo"])
+
+
+def test_evaluar_lote_infiere_una_vez_los_casos_repetidos(sistema):
+    resultados = sistema.evaluar_lote([(30, 5000, 7, 8), (30.0, 5000, 7, 8)] * 2)
+
+    assert sistema.inferencias == 1
+    assert len(resultados) == 4
+
+
+def test_evaluar_lote_reutiliza_el_almacen(sistema, almacen):
+    primeros = sistema.evaluar_lote(CASOS, almacen)
+    assert sistema.inferencias == len(CASOS)
+
+    segundos = sistema.evaluar_lote(CASOS, almacen)
+    assert sistema.inferencias == len(CASOS)
+    assert segundos == primeros
+
+
+def test_evaluar_lote_devuelve_float_con_y_sin_almacen(sistema, almacen):
+    inferidos = sistema.evaluar_lote(CASOS, almacen)
+    guardados = sistema.evaluar_lote(CASOS, almacen)
+
+    for resultado in inferidos + guardados:
+        for clave in ("valor_perfil", "potencial", "riesgo"):
+            assert type(resultado[clave]) is float
+
+
+def test_evaluar_lote_guarda_lo_inferido_antes_de_un_error(sistema, almacen):
+    with pytest.raises(ValueError):
+        sistema.evaluar_lote([CASOS[0], (10, 5000, 7, 8)], almacen)
+
+    sistema.evaluar_lote([CASOS[0]], almacen)
+    assert sistema.inferencias == 2  # el caso válido y el inválido, una vez cada uno
+
+
+def test_cambio_de_reglas_no_reutiliza_resultados(sistema, almacen):
+    otro = SistemaSinUltimaRegla()
+    assert otro.huella_modelo() != sistema.huella_modelo()
+
+    sistema.evaluar_lote(CASOS, almacen)
+    otro.evaluar_lote(CASOS, almacen)
+    assert otro.inferencias == len(CASOS)
+
+
+def test_varios_modelos_comparten_el_almacen(sistema, almacen):
+    otro = SistemaSinUltimaRegla()
+
+    sistema.evaluar_lote(CASOS, almacen)
+    otro.evaluar_lote(CASOS, almacen)
+    sistema.evaluar_lote(CASOS, almacen)
+    otro.evaluar_lote(CASOS, almacen)
+
+    assert sistema.inferencias == len(CASOS)
+    assert otro.inferencias == len(CASOS)
+
+
+def test_descartar_huella_elimina_solo_ese_modelo(sistema, almacen):
+    otro = SistemaSinUltimaRegla()
+    sistema.evaluar_lote(CASOS, almacen)
+    otro.evaluar_lote(CASOS, almacen)
+
+    assert almacen.descartar_huella(otro.huella_modelo()) == len(CASOS)
+
+    sistema.evaluar_lote(CASOS, almacen)
+    otro.evaluar_lote(CASOS, almacen)
+    assert sistema.inferencias == len(CASOS)
+    assert otro.inferencias == 2 * len(CASOS)
+
+
+def test_almacen_persiste_entre_conexiones(sistema, tmp_path):
+    ruta = str(tmp_path / "resultados.db")
+    with AlmacenResultados(ruta) as almacen:
+        sistema.evaluar_lote(CASOS, almacen)
+    with AlmacenResultados(ruta) as almacen:
+        sistema.evaluar_lote(CASOS, almacen)
+
+    assert sistema.inferencias == len(CASOS)
+
+
+def test_almacen_se_usa_desde_otro_hilo(sistema, almacen):
+    errores = []
+
+    def evaluar():
+        try:
+            sistema.evaluar_lote(CASOS, almacen)
+        except Exception as e:
+            errores.append(e)
+
+    hilo = threading.Thread(target=evaluar)
+    hilo.start()
+    hilo.join()
+
+    assert errores == []
+    assert len(almacen.buscar_lote(almacen.claves(sistema.huella_modelo(), CASOS))) == 3
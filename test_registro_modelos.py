@@ -0,0 +1,147 @@
+"""
+Pruebas del registro de versiones y de la creación de modelos con nuevos parámetros
+"""
+
+import threading
+
+import pytest
+
+from almacen_resultados import AlmacenResultados
+from registro_modelos import RegistroModelos
+from sistema_experto import PARAMETROS_MEMBRESIA, SistemaExpertoDifusoInversorFCL
+
+# Caso afectado por el cambio de la función "joven" de la edad
+CASO = (42, 3000, 5, 5)
+CAMBIO = {"edad": {"joven": [20, 20, 40, 50]}}
+
+
+@pytest.fixture(scope="module")
+def modelo_base():
+    return SistemaExpertoDifusoInversorFCL()
+
+
+@pytest.fixture
+def registro(modelo_base):
+    return RegistroModelos(modelo_base)
+
+
+def test_con_parametros_no_modifica_el_modelo_original(modelo_base):
+    original = modelo_base.evaluar(*CASO)
+    huella = modelo_base.huella_modelo()
+    mf = modelo_base.edad["joven"].mf.copy()
+
+    nuevo = modelo_base.con_parametros(CAMBIO, 2)
+
+    assert nuevo.evaluar(*CASO)["valor_perfil"] != original["valor_perfil"]
+    assert modelo_base.evaluar(*CASO) == original
+    assert modelo_base.huella_modelo() == huella
+    assert (modelo_base.edad["joven"].mf == mf).all()
+    assert modelo_base.parametros == PARAMETROS_MEMBRESIA
+
+
+def test_con_parametros_equivale_a_construir_el_modelo(modelo_base):
+    parametros = {
+        nombre: dict(terminos) for nombre, terminos in PARAMETROS_MEMBRESIA.items()
+    }
+    parametros["edad"]["joven"] = [20, 20, 40, 50]
+    construido = SistemaExpertoDifusoInversorFCL(parametros)
+
+    nuevo = modelo_base.con_parametros(CAMBIO, 2)
+
+    assert nuevo.huella_modelo() == construido.huella_modelo()
+    assert nuevo.evaluar(*CASO)["valor_perfil"] == pytest.approx(
+        construido.evaluar(*CASO)["valor_perfil"]
+    )
+
+
+@pytest.mark.parametrize(
+    "cambios",
+    [
+        {"edadd": {"joven": [20, 20, 30, 40]}},
+        {"edad": {"viejo": [20, 20, 30, 40]}},
+        {"edad": [20, 20, 30, 40]},
+        {"edad": {"joven": [20, 30]}},
+        {"edad": {"joven": [45, 35, 20, 20]}},
+        {"edad": {"joven": [20, 20, "x", 45]}},
+        {"edad": {"joven": [10, 20, 30, 40]}},
+    ],
+)
+def test_publicar_rechaza_parametros_invalidos(registro, cambios):
+    with pytest.raises(ValueError):
+        registro.publicar(cambios)
+
+    assert registro.versiones() == [1]
+
+
+def test_publicar_y_activar_versiones(registro):
+    assert registro.version_activa == 1
+
+    version = registro.publicar(CAMBIO)
+    assert version == 2
+    assert registro.version_activa == 2
+    assert registro.evaluar(*CASO)["version"] == 2
+
+    assert registro.publicar({"edad": {"medio": [35, 45, 60]}}, activar=False) == 3
+    assert registro.version_activa == 2
+    assert registro.versiones() == [1, 2, 3]
+
+    registro.activar(1)
+    assert registro.evaluar(*CASO)["version"] == 1
+    assert registro.evaluar_lote([CASO])[0]["version"] == 1
+
+    with pytest.raises(ValueError):
+        registro.activar(99)
+
+
+def test_cambiar_de_version_conserva_el_almacen(registro, tmp_path, monkeypatch):
+    registro.publicar(CAMBIO)
+    inferencias = []
+    for version in (1, 2):
+        modelo = registro.modelo(version)
+        evaluar = modelo.evaluar
+
+        def contar(*caso, evaluar=evaluar):
+            inferencias.append(caso)
+            return evaluar(*caso)
+
+        monkeypatch.setattr(modelo, "evaluar", contar)
+
+    casos = [CASO, (30, 5000, 7, 8)]
+    with AlmacenResultados(str(tmp_path / "resultados.db")) as almacen:
+        for version in (1, 2, 1, 2, 1):
+            registro.activar(version)
+            resultados = registro.evaluar_lote(casos, almacen)
+            assert {resultado["version"] for resultado in resultados} == {version}
+
+    assert len(inferencias) == 2 * len(casos)
+
+
+def test_evaluaciones_concurrentes_durante_publicaciones(registro):
+    modelo = registro.modelo()
+    casos = [
+        (20 + i % 80, 100 + i * 70, 1 + i % 10, 1 + (i * 3) % 10) for i in range(50)
+    ]
+    esperados = [modelo.evaluar(*caso)["valor_perfil"] for caso in casos]
+    errores = []
+
+    def evaluar():
+        try:
+            for caso, esperado in zip(casos, esperados):
+                if modelo.evaluar(*caso)["valor_perfil"] != esperado:
+                    errores.append(caso)
+        except Exception as e:
+            errores.append(e)
+
+    def publicar():
+        for i in range(3):
+            registro.publicar({"edad": {"joven": [20, 20, 30 + i, 45]}})
+
+    hilos = [threading.Thread(target=evaluar) for _ in range(4)]
+    hilos.append(threading.Thread(target=publicar))
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert errores == []
+    assert registro.versiones() == [1, 2, 3, 4]